@@ -2,6 +2,8 @@
 ASGI config for DjangoRemoteBot project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP is served by Django; WebSocket connections go to the interactive match
+channel in ``bot.streaming``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +15,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DjangoRemoteBot.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up, since the views need the app registry.
+from bot.streaming import MatchWebSocket  # noqa: E402
+from bot.views import bot_instance  # noqa: E402
+
+match_websocket = MatchWebSocket(bot_instance)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await match_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'bot',
 ]
 
 MIDDLEWARE = [
@@ -121,3 +122,17 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Bot decision profiling
+# Bot decisions requested with the X-Bot-Profile header, plus a random SAMPLE_RATE
+# fraction of all decisions, run under cProfile, one at a time per process. Only the
+# KEEP most recent profiles are kept in DIRECTORY. Set HEADER to None to ignore the
+# header. Aggregate with `python manage.py profile_report`.
+
+BOT_PROFILING = {
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'SAMPLE_RATE': 0.0,
+    'HEADER': 'HTTP_X_BOT_PROFILE' if DEBUG else None,
+    'KEEP': 200,
+}
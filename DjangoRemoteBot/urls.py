@@ -19,11 +19,15 @@ from django.urls import path
 from bot import views
 from bot.views import getMaoDeOnzeResponse
 from bot.views import getName
+from bot.views import getCoalescingStats
+from bot.views import streamMatch
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('mao-de-onze/', getMaoDeOnzeResponse),
-    path('name/',getName)
+    path('name/',getName),
+    path('coalescing-stats/', getCoalescingStats),
+    path('match-stream/', streamMatch)
     # path('if-raises/', botActions.decideIfRaises),	
     # path('choose-card/', botActions.chooseCard),
     # path('raise-response/', botActions.getRaiseResponse),
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from typing import Dict
+
+from bot.game_model.card_to_play import CardToPlay
+from bot.game_model.game_intel import GameIntel
+from bot.game_model.interfaces import BotServiceProvider
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave: apenas a primeira executa a função e todas as
+    outras, síncronas ou assíncronas, recebem o mesmo resultado (ou a mesma exceção).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[object, _Call] = {}
+        self._async_calls: Dict[object, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, function):
+        """
+        Executa function() para a chave, ou espera a execução que já está em andamento.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key, function):
+        """
+        Versão assíncrona de do(): a função síncrona roda em uma thread e as corrotinas do mesmo event loop
+        com a chave igual aguardam o mesmo resultado. A execução também é compartilhada com chamadas do().
+        A computação compartilhada é uma task própria, aguardada por todos via asyncio.shield, então
+        cancelar uma chamada afeta apenas quem foi cancelado.
+        """
+        loop = asyncio.get_running_loop()
+        async_key = (loop, key)
+        with self._lock:
+            task = self._async_calls.get(async_key)
+            if task is None:
+                task = loop.create_task(asyncio.to_thread(self.do, key, function))
+                self._async_calls[async_key] = task
+                task.add_done_callback(lambda done: self._forget(async_key, done))
+            else:
+                self.calls += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, async_key, task: asyncio.Task):
+        with self._lock:
+            del self._async_calls[async_key]
+        if not task.cancelled():
+            # Evita o aviso de exceção nunca recuperada quando todos os chamadores foram cancelados.
+            task.exception()
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores: chamadas recebidas, execuções reais e chamadas atendidas por uma execução
+        compartilhada.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "deduplicated": self.calls - self.executions,
+            }
+
+
+class CoalescingBotServiceProvider(BotServiceProvider):
+    """
+    Envolve um BotServiceProvider para que requisições concorrentes com o mesmo GameIntel e a mesma
+    operação compartilhem uma única computação. Os métodos com prefixo "a" são as versões assíncronas.
+    """
+
+    def __init__(self, bot: BotServiceProvider, flight: SingleFlight = None):
+        self.bot = bot
+        self.flight = flight if flight is not None else SingleFlight()
+
+    def get_mao_de_onze_response(self, intel: GameIntel) -> bool:
+        return self.flight.do(("get_mao_de_onze_response", intel), lambda: self.bot.get_mao_de_onze_response(intel))
+
+    def decide_if_raises(self, intel: GameIntel) -> bool:
+        return self.flight.do(("decide_if_raises", intel), lambda: self.bot.decide_if_raises(intel))
+
+    def choose_card(self, intel: GameIntel) -> CardToPlay:
+        return self.flight.do(("choose_card", intel), lambda: self.bot.choose_card(intel))
+
+    def get_raise_response(self, intel: GameIntel) -> int:
+        return self.flight.do(("get_raise_response", intel), lambda: self.bot.get_raise_response(intel))
+
+    async def aget_mao_de_onze_response(self, intel: GameIntel) -> bool:
+        return await self.flight.do_async(("get_mao_de_onze_response", intel),
+                                          lambda: self.bot.get_mao_de_onze_response(intel))
+
+    async def adecide_if_raises(self, intel: GameIntel) -> bool:
+        return await self.flight.do_async(("decide_if_raises", intel), lambda: self.bot.decide_if_raises(intel))
+
+    async def achoose_card(self, intel: GameIntel) -> CardToPlay:
+        return await self.flight.do_async(("choose_card", intel), lambda: self.bot.choose_card(intel))
+
+    async def aget_raise_response(self, intel: GameIntel) -> int:
+        return await self.flight.do_async(("get_raise_response", intel), lambda: self.bot.get_raise_response(intel))
+
+    def getName(self) -> str:
+        return self.bot.getName()
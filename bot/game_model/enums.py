@@ -49,13 +49,7 @@ class CardRank(Enum):
         return self._value
 
     def next(self):
-        if self == CardRank.THREE:  
-            return CardRank.FOUR
-        elif self == CardRank.HIDDEN: 
-            return CardRank.HIDDEN
-        else:
-            next_value = self._value + 1
-            return CardRank(next_value)
+        return _NEXT_RANK[self]
 
     @staticmethod
     def of_symbol(symbol):
@@ -67,3 +61,7 @@ class CardRank(Enum):
     def __str__(self):
         return self.symbol
 
+# Sucessor de cada rank, calculado uma vez: o THREE volta para o FOUR e o HIDDEN continua HIDDEN.
+_OPEN_RANKS = [rank for rank in CardRank if rank != CardRank.HIDDEN]
+_NEXT_RANK = {rank: _OPEN_RANKS[(index + 1) % len(_OPEN_RANKS)] for index, rank in enumerate(_OPEN_RANKS)}
+_NEXT_RANK[CardRank.HIDDEN] = CardRank.HIDDEN
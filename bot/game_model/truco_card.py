@@ -2,6 +2,13 @@ from django.db import models
 from bot.game_model.enums import CardRank, CardSuit
 import threading 
 
+_MANILHA_VALUES = {
+    "DIAMONDS": 10,
+    "SPADES": 11,
+    "HEARTS": 12,
+    "CLUBS": 13
+}
+
 '''
 <p>Represents a valid truco card described in terms of a {@link CardRank} and a {@link CardSuit}. It also
 encompasses a method to compare its value based on a vira card, as well as methods to check if the card is
@@ -37,7 +44,7 @@ class TrucoCard:
         # Usa a trava para garantir que apenas um thread acessa o cache por vez
         with TrucoCard._cache_lock:
             # Gera a chave do cache com base no valor do rank e suit
-            cache_key = (rank.value(), suit.value())
+            cache_key = (rank.value, suit.value)
             
             if cache_key not in TrucoCard._cache:
                 TrucoCard._cache[cache_key] = TrucoCard(rank, suit)
@@ -110,16 +117,12 @@ class TrucoCard:
     */
     '''
     def relative_value(self, vira: 'TrucoCard') -> int:
-        if self.is_manilha(vira):
-            return {
-                "DIAMONDS": 10,
-                "SPADES": 11,
-                "HEARTS": 12,
-                "CLUBS": 13
-            }[self.suit.name]
+        manilha_rank = vira.rank.next()
+        if self.rank == manilha_rank:
+            return _MANILHA_VALUES[self.suit.name]
         if self.rank.value == 0:
             return 0
-        return self.rank.value - 1 if self.rank.value > vira.rank.value else self.rank.value
+        return self.rank.value - 1 if self.rank.value > manilha_rank.value else self.rank.value
       
     '''
     /**
@@ -213,5 +216,8 @@ class TrucoCard:
             return False
         return self.rank == other.rank and self.suit == other.suit
 
+    def __hash__(self):
+        return hash((self.rank, self.suit))
+
     def __repr__(self):
         return f"[{self.rank.name} {self.suit.name}]"
\ No newline at end of file
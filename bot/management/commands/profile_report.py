@@ -0,0 +1,32 @@
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.profiling import aggregate, get_profiler, write_folded
+
+
+class Command(BaseCommand):
+    help = "Agrega os perfis gravados pelo RequestProfiler e imprime as funções mais custosas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operation', help="Considera apenas os perfis desta operação (ex.: choose_card).")
+        parser.add_argument('--directory', help="Diretório dos perfis. Padrão: settings.BOT_PROFILING['DIRECTORY'].")
+        parser.add_argument('--sort', default='cumulative', help="Chave de ordenação do pstats.")
+        parser.add_argument('--limit', type=int, default=30, help="Quantidade de funções impressas.")
+        parser.add_argument('--folded', help="Grava também a saída em formato folded stacks neste arquivo.")
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or get_profiler().directory
+        stats = aggregate(directory, options['operation'])
+        if stats is None:
+            raise CommandError(f"No profiles found in {directory}.")
+
+        # O OutputWrapper acrescenta uma quebra de linha a cada write; o pstats escreve coluna por coluna.
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(report.getvalue(), ending='')
+
+        if options['folded']:
+            written = write_folded(stats, options['folded'])
+            self.stdout.write(f"Wrote {written} stacks to {options['folded']}")
@@ -0,0 +1,218 @@
+import asyncio
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+from bot.game_model.card_to_play import CardToPlay
+from bot.game_model.game_intel import GameIntel
+from bot.game_model.interfaces import BotServiceProvider
+
+# O cProfile admite apenas um profiler ativo por processo a partir do Python 3.12.
+_active_profile_lock = threading.Lock()
+
+
+class RequestProfiler:
+    """
+    Executa chamadas do BotServiceProvider sob o cProfile quando a requisição é amostrada
+    ou traz o cabeçalho de depuração. Cada perfil é gravado como um arquivo .prof em um
+    diretório local que mantém apenas os `keep` arquivos mais recentes.
+    """
+
+    def __init__(self, directory, sample_rate: float = 0.0, header: Optional[str] = 'HTTP_X_BOT_PROFILE',
+                 keep: int = 200):
+        if keep < 1:
+            raise ValueError("The profiler must keep at least one profile.")
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.header = header
+        self.keep = keep
+        self._rotate_lock = threading.Lock()
+
+    @staticmethod
+    def from_settings() -> 'RequestProfiler':
+        """
+        Cria o profiler a partir de settings.BOT_PROFILING.
+        """
+        config = getattr(settings, 'BOT_PROFILING', {})
+        return RequestProfiler(config.get('DIRECTORY', Path(settings.BASE_DIR) / 'profiles'),
+                               sample_rate=config.get('SAMPLE_RATE', 0.0),
+                               header=config.get('HEADER', 'HTTP_X_BOT_PROFILE'),
+                               keep=config.get('KEEP', 200))
+
+    def is_requested(self, meta) -> bool:
+        """
+        Retorna True se os cabeçalhos da requisição (no formato de request.META) pedem o perfil.
+        """
+        return bool(self.header and meta and meta.get(self.header))
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """
+        Retorna True se o perfil foi pedido pelo cabeçalho de depuração ou se a chamada foi sorteada pela
+        amostragem.
+        """
+        if requested:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, operation: str, function, *args, **kwargs):
+        """
+        Executa function(*args, **kwargs) sob o cProfile e grava o perfil, mesmo que a chamada falhe.
+        Se outro perfil já estiver em andamento, a chamada é executada sem perfil.
+        """
+        if not _active_profile_lock.acquire(blocking=False):
+            return function(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(function, *args, **kwargs)
+            finally:
+                self._dump(operation, profile)
+        finally:
+            _active_profile_lock.release()
+
+    def _dump(self, operation: str, profile: cProfile.Profile):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{operation}-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.prof"
+        profile.dump_stats(self.directory / name)
+        self._rotate()
+
+    def _rotate(self):
+        with self._rotate_lock:
+            profiles = sorted(self.directory.glob('*.prof'), key=_modified_at)
+            for stale in profiles[:-self.keep]:
+                stale.unlink(missing_ok=True)
+
+
+def _modified_at(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> RequestProfiler:
+    """
+    Retorna o profiler do processo, criado sob demanda a partir das settings.
+    """
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler.from_settings()
+    return _profiler
+
+
+class ProfilingBotServiceProvider(BotServiceProvider):
+    """
+    Envolve um BotServiceProvider para executar suas chamadas sob o RequestProfiler quando a chamada é
+    sorteada pela amostragem ou quando force_profile é True (cabeçalho de depuração). As versões
+    assíncronas delegam aos métodos com prefixo "a" do bot envolvido, ou, quando há perfil, executam o
+    método síncrono em uma thread para que o cProfile enxergue a computação.
+    """
+
+    def __init__(self, bot: BotServiceProvider, profiler: RequestProfiler = None):
+        self.bot = bot
+        self._profiler = profiler
+
+    @property
+    def profiler(self) -> RequestProfiler:
+        return self._profiler if self._profiler is not None else get_profiler()
+
+    def _call(self, operation: str, intel: GameIntel, force_profile: bool):
+        function = getattr(self.bot, operation)
+        if not self.profiler.should_profile(force_profile):
+            return function(intel)
+        return self.profiler.run(operation, function, intel)
+
+    async def _acall(self, operation: str, intel: GameIntel, force_profile: bool):
+        if not self.profiler.should_profile(force_profile):
+            return await getattr(self.bot, "a" + operation)(intel)
+        return await asyncio.to_thread(self.profiler.run, operation, getattr(self.bot, operation), intel)
+
+    def get_mao_de_onze_response(self, intel: GameIntel, force_profile: bool = False) -> bool:
+        return self._call("get_mao_de_onze_response", intel, force_profile)
+
+    def decide_if_raises(self, intel: GameIntel, force_profile: bool = False) -> bool:
+        return self._call("decide_if_raises", intel, force_profile)
+
+    def choose_card(self, intel: GameIntel, force_profile: bool = False) -> CardToPlay:
+        return self._call("choose_card", intel, force_profile)
+
+    def get_raise_response(self, intel: GameIntel, force_profile: bool = False) -> int:
+        return self._call("get_raise_response", intel, force_profile)
+
+    async def aget_mao_de_onze_response(self, intel: GameIntel, force_profile: bool = False) -> bool:
+        return await self._acall("get_mao_de_onze_response", intel, force_profile)
+
+    async def adecide_if_raises(self, intel: GameIntel, force_profile: bool = False) -> bool:
+        return await self._acall("decide_if_raises", intel, force_profile)
+
+    async def achoose_card(self, intel: GameIntel, force_profile: bool = False) -> CardToPlay:
+        return await self._acall("choose_card", intel, force_profile)
+
+    async def aget_raise_response(self, intel: GameIntel, force_profile: bool = False) -> int:
+        return await self._acall("get_raise_response", intel, force_profile)
+
+    def getName(self) -> str:
+        return self.bot.getName()
+
+
+def aggregate(directory, operation: Optional[str] = None) -> Optional[pstats.Stats]:
+    """
+    Soma todos os perfis gravados em directory (opcionalmente só os de uma operação).
+    Retorna None se não houver nenhum perfil.
+    """
+    pattern = f"{operation}-*.prof" if operation else '*.prof'
+    profiles = sorted(Path(directory).glob(pattern))
+    if not profiles:
+        return None
+    stats = pstats.Stats(str(profiles[0]))
+    for profile in profiles[1:]:
+        stats.add(str(profile))
+    return stats
+
+
+def write_folded(stats: pstats.Stats, output) -> int:
+    """
+    Grava as estatísticas no formato "folded stacks" (uma pilha por linha, frames separados por ';'
+    e o peso em microssegundos ao final), aceito por flamegraph.pl e speedscope.
+
+    O cProfile só registra arestas chamador -> chamado, então cada pilha tem no máximo dois níveis:
+    o tempo próprio de cada função é atribuído ao chamador que o gerou.
+    Retorna o número de linhas gravadas.
+    """
+    lines = []
+    for function, (_, _, own_time, _, callers) in stats.stats.items():
+        label = _frame_label(function)
+        if not callers:
+            lines.append((label, own_time))
+            continue
+        for caller, caller_stats in callers.items():
+            lines.append((f"{_frame_label(caller)};{label}", caller_stats[2]))
+
+    written = 0
+    with open(output, 'w') as folded:
+        for stack, seconds in sorted(lines):
+            weight = int(seconds * 1_000_000)
+            if weight > 0:
+                folded.write(f"{stack} {weight}\n")
+                written += 1
+    return written
+
+
+def _frame_label(function) -> str:
+    filename, line, name = function
+    if filename == '~':
+        return name.replace(';', ':')
+    return f"{os.path.basename(filename)}:{line}({name})".replace(';', ':')
@@ -0,0 +1,117 @@
+from typing import List, Optional
+
+from bot.game_model.game_intel import GameIntel
+
+WINNING_SCORE = 12
+MAO_DE_ONZE_SCORE = 11
+MAO_DE_ONZE_POINTS = 3
+STAKES = (1, 3, 6, 9, 12)
+
+QUIT = -1
+ACCEPT = 0
+RE_RAISE = 1
+
+
+def next_stake(hand_points: int) -> Optional[int]:
+    """
+    Retorna o valor da mão após um pedido de aumento, ou None se a mão já vale 12.
+    """
+    for stake in STAKES:
+        if stake > hand_points:
+            return stake
+    return None
+
+
+def build_match_equity(hand_win_probability: float = 0.5) -> 'MatchEquityTable':
+    """
+    Calcula, por programação dinâmica, a probabilidade de o bot vencer a partida a partir de cada placar,
+    no início de uma mão. As mãos futuras valem 1 ponto e são vencidas com hand_win_probability; na mão de
+    onze quem tem 11 pontos escolhe entre jogar valendo 3 ou correr e entregar 1 ponto, e na mão de ferro
+    (11 a 11) a mão vale 1.
+    """
+    equities = [0.0] * (WINNING_SCORE + 1) ** 2
+    # A tabela é preenchida dos placares mais altos para os mais baixos, lendo sempre por table.equity.
+    table = MatchEquityTable(equities)
+
+    def played(score: int, opponent_score: int, points: int) -> float:
+        return table.hand_equity(score, opponent_score, points, hand_win_probability)
+
+    for score in range(WINNING_SCORE, -1, -1):
+        for opponent_score in range(WINNING_SCORE, -1, -1):
+            if score >= WINNING_SCORE or opponent_score >= WINNING_SCORE:
+                value = table.equity(score, opponent_score)
+            elif score == MAO_DE_ONZE_SCORE and opponent_score == MAO_DE_ONZE_SCORE:
+                value = played(score, opponent_score, 1)
+            elif score == MAO_DE_ONZE_SCORE:
+                value = max(played(score, opponent_score, MAO_DE_ONZE_POINTS), table.equity(score, opponent_score + 1))
+            elif opponent_score == MAO_DE_ONZE_SCORE:
+                value = min(played(score, opponent_score, MAO_DE_ONZE_POINTS), table.equity(score + 1, opponent_score))
+            else:
+                value = played(score, opponent_score, 1)
+            equities[score * (WINNING_SCORE + 1) + opponent_score] = value
+    return table
+
+
+class MatchEquityTable:
+    """
+    Tabela densa 13x13 com a probabilidade de vencer a partida a partir de cada placar. Converte a
+    probabilidade de vencer a mão atual em decisões de aumento, aceite ou reaumento com poucas consultas.
+    """
+
+    def __init__(self, equities: List[float]):
+        if len(equities) != (WINNING_SCORE + 1) ** 2:
+            raise ValueError("The equity table must have one entry per score pair.")
+        self.equities = equities
+
+    def equity(self, score: int, opponent_score: int) -> float:
+        """
+        Retorna a probabilidade de vencer a partida a partir do placar, no início de uma mão.
+        """
+        if score >= WINNING_SCORE:
+            return 1.0
+        if opponent_score >= WINNING_SCORE:
+            return 0.0
+        return self.equities[score * (WINNING_SCORE + 1) + opponent_score]
+
+    def hand_equity(self, score: int, opponent_score: int, hand_points: int, hand_win_probability: float) -> float:
+        """
+        Retorna a probabilidade de vencer a partida se a mão atual for jogada até o fim valendo hand_points.
+        """
+        return (hand_win_probability * self.equity(score + hand_points, opponent_score) +
+                (1 - hand_win_probability) * self.equity(score, opponent_score + hand_points))
+
+    def should_raise(self, intel: GameIntel, hand_win_probability: float, fold_probability: float = 0.0) -> bool:
+        """
+        Indica se pedir aumento melhora a chance de vencer a partida. fold_probability é a chance estimada
+        de o oponente correr e entregar os pontos atuais da mão.
+        """
+        score, opponent_score, hand_points = intel.score, intel.opponent_score, intel.hand_points
+        stake = next_stake(hand_points)
+        if stake is None or MAO_DE_ONZE_SCORE in (score, opponent_score):
+            return False
+        keep = self.hand_equity(score, opponent_score, hand_points, hand_win_probability)
+        accepted = self.hand_equity(score, opponent_score, stake, hand_win_probability)
+        folded = self.equity(score + hand_points, opponent_score)
+        return fold_probability * folded + (1 - fold_probability) * accepted > keep
+
+    def raise_response(self, intel: GameIntel, hand_win_probability: float) -> int:
+        """
+        Responde a um pedido de aumento: QUIT (-1), ACCEPT (0) ou RE_RAISE (1), escolhendo a opção com
+        maior chance de vencer a partida. O reaumento supõe que o oponente aceita.
+        """
+        score, opponent_score, hand_points = intel.score, intel.opponent_score, intel.hand_points
+        stake = next_stake(hand_points)
+        if stake is None:
+            return ACCEPT
+        quit_equity = self.equity(score, opponent_score + hand_points)
+        accept_equity = self.hand_equity(score, opponent_score, stake, hand_win_probability)
+
+        re_raise_stake = next_stake(stake)
+        if re_raise_stake is not None and MAO_DE_ONZE_SCORE not in (score, opponent_score):
+            re_raise_equity = self.hand_equity(score, opponent_score, re_raise_stake, hand_win_probability)
+            if re_raise_equity > accept_equity and re_raise_equity >= quit_equity:
+                return RE_RAISE
+        return ACCEPT if accept_equity >= quit_equity else QUIT
+
+
+MATCH_EQUITY = build_match_equity()
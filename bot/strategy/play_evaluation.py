@@ -0,0 +1,64 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from bot.game_model.card_to_play import CardToPlay
+from bot.game_model.game_intel import GameIntel
+from bot.strategy.unseen_cards import CARD_ID, DECK, MAX_RELATIVE_VALUE, binomial, opponent_hand_size, relative_values
+
+# RELATIVE_VALUES[vira_id, card_id] é o relative_value da carta para aquela vira.
+RELATIVE_VALUES = np.array([relative_values(vira) for vira in DECK], dtype=np.float64)
+
+_BINOMIAL = np.array([[binomial(n, k) for k in range(len(DECK) + 1)] for n in range(len(DECK) + 1)],
+                     dtype=np.float64)
+
+CARD_COST = 0.05
+
+
+def evaluate_plays(intel: GameIntel, card_cost: float = CARD_COST) -> List[Tuple[CardToPlay, float]]:
+    """
+    Avalia de uma vez todas as jogadas possíveis (jogar ou, a partir da segunda rodada, descartar cada carta
+    da mão) e retorna pares (CardToPlay, pontuação) da melhor para a pior.
+
+    Com opponent_card conhecida a pontuação é 1, 0 ou -1 para vitória, empate ou derrota na rodada. Sem ela,
+    é P(o oponente não empata nem vence) - P(o oponente vence), as mesmas probabilidades hipergeométricas do
+    UnseenCardTracker, calculadas em lote sobre as cartas não vistas.
+    De cada pontuação é subtraído card_cost proporcional ao valor da carta gasta, para preferir a carta mais
+    fraca entre jogadas equivalentes. Em caso de empate, jogar vem antes de descartar.
+    """
+    values = RELATIVE_VALUES[CARD_ID[intel.vira]]
+    hand_values = values[[CARD_ID[card] for card in intel.cards]]
+    plays = [CardToPlay.of(card) for card in intel.cards]
+
+    played_values = hand_values
+    spent_values = hand_values
+    if intel.round_results:
+        played_values = np.concatenate([hand_values, np.zeros_like(hand_values)])
+        spent_values = np.concatenate([hand_values, hand_values])
+        plays += [CardToPlay.discard(card) for card in intel.cards]
+
+    if intel.opponent_card is not None:
+        outcomes = np.sign(played_values - intel.opponent_card.relative_value(intel.vira))
+    else:
+        outcomes = _leading_outcomes(intel, values, played_values)
+
+    scores = outcomes - card_cost * spent_values / MAX_RELATIVE_VALUE
+    order = np.argsort(-scores, kind='stable')
+    return [(plays[index], float(scores[index])) for index in order]
+
+
+def _leading_outcomes(intel: GameIntel, values: np.ndarray, played_values: np.ndarray) -> np.ndarray:
+    seen = np.zeros(len(DECK), dtype=bool)
+    seen_ids = [CARD_ID[card] for card in (*intel.cards, *intel.open_cards, intel.vira) if card in CARD_ID]
+    seen[seen_ids] = True
+    unseen_values = np.sort(values[~seen])
+
+    unseen_count = unseen_values.size
+    hand_size = opponent_hand_size(intel, unseen_count)
+    total = _BINOMIAL[unseen_count, hand_size]
+
+    beating = unseen_count - np.searchsorted(unseen_values, played_values, side='right')
+    beating_or_tying = unseen_count - np.searchsorted(unseen_values, played_values, side='left')
+    beats = 1.0 - _BINOMIAL[unseen_count - beating, hand_size] / total
+    beats_or_ties = 1.0 - _BINOMIAL[unseen_count - beating_or_tying, hand_size] / total
+    return (1.0 - beats_or_ties) - beats
@@ -0,0 +1,142 @@
+from typing import List, Tuple
+
+from bot.game_model.enums import CardRank, CardSuit
+from bot.game_model.game_intel import GameIntel
+from bot.game_model.truco_card import TrucoCard
+
+HAND_SIZE = 3
+MAX_RELATIVE_VALUE = 13
+MANILHA_MIN_VALUE = 10
+
+DECK = tuple(TrucoCard.of(rank, suit)
+             for rank in CardRank if rank != CardRank.HIDDEN
+             for suit in CardSuit if suit != CardSuit.HIDDEN)
+
+CARD_ID = {card: card_id for card_id, card in enumerate(DECK)}
+
+# _RELATIVE_VALUES[vira][card_id] é o relative_value da carta para aquela vira, calculado uma vez.
+_RELATIVE_VALUES = {vira: tuple(card.relative_value(vira) for card in DECK) for vira in DECK}
+
+
+def relative_values(vira: TrucoCard) -> Tuple[int, ...]:
+    """
+    Retorna o relative_value de cada carta do DECK (na ordem de CARD_ID) para a vira informada.
+    """
+    return _RELATIVE_VALUES[vira]
+
+
+def _binomial_table(size: int) -> List[List[int]]:
+    table = [[1]]
+    for n in range(1, size + 1):
+        previous = table[-1]
+        table.append([1] + [previous[k - 1] + previous[k] for k in range(1, n)] + [1])
+    return table
+
+
+_BINOMIAL = _binomial_table(len(DECK))
+
+
+def binomial(n: int, k: int) -> int:
+    """
+    Retorna C(n, k) a partir da tabela pré-calculada, ou 0 se k estiver fora de [0, n].
+    """
+    if k < 0 or k > n:
+        return 0
+    return _BINOMIAL[n][k]
+
+
+def opponent_hand_size(intel: GameIntel, unseen_count: int) -> int:
+    """
+    Retorna quantas cartas o oponente ainda tem na mão, limitado à quantidade de cartas não vistas.
+    """
+    size = HAND_SIZE - len(intel.round_results) - (1 if intel.opponent_card is not None else 0)
+    return max(0, min(size, unseen_count))
+
+
+class UnseenCardTracker:
+    """
+    Conjunto exato das cartas que o bot ainda não viu, calculado a partir de cards, open_cards, vira e
+    opponent_card. As cartas restantes do oponente são tratadas como uma amostra uniforme, sem reposição,
+    das cartas não vistas, então as probabilidades são hipergeométricas e saem direto da tabela de
+    binomiais, sem simulação.
+    """
+
+    def __init__(self, intel: GameIntel):
+        self.vira = intel.vira
+        self._values = relative_values(intel.vira)
+        seen = set(intel.cards) | set(intel.open_cards) | {intel.vira}
+        if intel.opponent_card is not None:
+            seen.add(intel.opponent_card)
+        self.unseen = tuple(card for card in DECK if card not in seen)
+
+        self.opponent_hand_size = opponent_hand_size(intel, len(self.unseen))
+
+        counts = [0] * (MAX_RELATIVE_VALUE + 1)
+        for card in self.unseen:
+            counts[self._values[CARD_ID[card]]] += 1
+        self._above = [0] * (MAX_RELATIVE_VALUE + 2)
+        for value in range(MAX_RELATIVE_VALUE, -1, -1):
+            self._above[value] = self._above[value + 1] + counts[value]
+        self._manilhas = self._above[MANILHA_MIN_VALUE]
+
+    @staticmethod
+    def of(intel: GameIntel) -> 'UnseenCardTracker':
+        return UnseenCardTracker(intel)
+
+    def _relative_value(self, card: TrucoCard) -> int:
+        card_id = CARD_ID.get(card)
+        return card.relative_value(self.vira) if card_id is None else self._values[card_id]
+
+    def count_beating(self, card: TrucoCard) -> int:
+        """
+        Retorna quantas cartas não vistas vencem a carta informada.
+        """
+        return self._above[self._relative_value(card) + 1]
+
+    def count_beating_or_tying(self, card: TrucoCard) -> int:
+        """
+        Retorna quantas cartas não vistas vencem ou empatam com a carta informada.
+        """
+        return self._above[self._relative_value(card)]
+
+    def count_manilhas(self) -> int:
+        """
+        Retorna quantas manilhas ainda não foram vistas.
+        """
+        return self._manilhas
+
+    def probability_holds_exactly(self, favorable: int, amount: int) -> float:
+        """
+        Probabilidade de o oponente ter exatamente `amount` cartas entre `favorable` cartas não vistas.
+        """
+        total = binomial(len(self.unseen), self.opponent_hand_size)
+        if total == 0:
+            return 0.0
+        others = len(self.unseen) - favorable
+        return binomial(favorable, amount) * binomial(others, self.opponent_hand_size - amount) / total
+
+    def probability_holds_any(self, favorable: int) -> float:
+        """
+        Probabilidade de o oponente ter ao menos uma entre `favorable` cartas não vistas.
+        """
+        if favorable <= 0 or self.opponent_hand_size == 0:
+            return 0.0
+        return 1.0 - self.probability_holds_exactly(favorable, 0)
+
+    def probability_opponent_beats(self, card: TrucoCard) -> float:
+        """
+        Probabilidade de o oponente ter uma carta que vence a carta informada.
+        """
+        return self.probability_holds_any(self.count_beating(card))
+
+    def probability_opponent_beats_or_ties(self, card: TrucoCard) -> float:
+        """
+        Probabilidade de o oponente ter uma carta que vence ou empata com a carta informada.
+        """
+        return self.probability_holds_any(self.count_beating_or_tying(card))
+
+    def probability_opponent_holds_manilha(self) -> float:
+        """
+        Probabilidade de o oponente ter ao menos uma manilha.
+        """
+        return self.probability_holds_any(self._manilhas)
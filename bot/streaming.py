@@ -0,0 +1,156 @@
+import json
+from typing import Optional
+
+from bot.game_model.card_to_play import CardToPlay
+from bot.game_model.enums import CardRank, CardSuit
+from bot.game_model.game_intel import GameIntel
+from bot.game_model.interfaces import BotServiceProvider
+from bot.game_model.truco_card import TrucoCard
+from bot.profiling import get_profiler
+
+MATCH_WEBSOCKET_PATH = '/ws/match/'
+
+OPERATIONS = ("get_mao_de_onze_response", "decide_if_raises", "choose_card", "get_raise_response")
+
+'''
+Protocolo do canal de partida, usado pelo WebSocket interativo em /ws/match/ e pelo endpoint em lote
+/match-stream/: cada mensagem é um objeto JSON em uma linha
+
+    {"id": 7, "operation": "choose_card", "intel": {"cards": [{"rank": "A", "suit": "C"}], "open_cards": [...],
+     "vira": {...}, "opponent_card": null, "round_results": ["WON"], "score": 0, "opponent_score": 0,
+     "hand_points": 1}}
+
+e cada resposta, enviada na mesma ordem, é {"id": 7, "operation": "choose_card", "result": ...} ou
+{"id": 7, "error": "..."}. O resultado de choose_card é {"card": {"rank": ..., "suit": ...}, "discard": bool}.
+'''
+
+
+def card_from_json(data) -> Optional[TrucoCard]:
+    if data is None:
+        return None
+    return TrucoCard.of(CardRank.of_symbol(data["rank"]), CardSuit.of_symbol(data["suit"]))
+
+
+def card_to_json(card: TrucoCard) -> dict:
+    return {"rank": card.rank.symbol, "suit": card.suit.symbol}
+
+
+def intel_from_json(data: dict) -> GameIntel:
+    return GameIntel([card_from_json(card) for card in data["cards"]],
+                     [card_from_json(card) for card in data["open_cards"]],
+                     card_from_json(data["vira"]),
+                     card_from_json(data.get("opponent_card")),
+                     list(data["round_results"]),
+                     int(data["score"]),
+                     int(data["opponent_score"]),
+                     int(data["hand_points"]))
+
+
+def result_to_json(result):
+    if isinstance(result, CardToPlay):
+        return {"card": card_to_json(result.content), "discard": result.discard}
+    return result
+
+
+def _parse(line):
+    """
+    Decodifica uma linha do canal e retorna (id, operação, intel).
+    """
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("Each message must be a JSON object.")
+    operation = message.get("operation")
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {operation}")
+    return message.get("id"), operation, intel_from_json(message["intel"])
+
+
+def _request_id(line):
+    try:
+        return json.loads(line).get("id")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _reply(request_id, operation, result) -> str:
+    return json.dumps({"id": request_id, "operation": operation, "result": result_to_json(result)})
+
+
+def _error(request_id, error: Exception) -> str:
+    return json.dumps({"id": request_id, "error": str(error)})
+
+
+def _decide(function, intel: GameIntel, force_profile: bool):
+    if force_profile:
+        return function(intel, force_profile=True)
+    return function(intel)
+
+
+def decide_line(bot: BotServiceProvider, line, force_profile: bool = False) -> str:
+    """
+    Responde a uma linha do canal usando os métodos síncronos do bot. Erros de decodificação ou do bot
+    viram uma resposta de erro, para que uma mensagem ruim não encerre o canal. force_profile é repassado
+    ao bot (um ProfilingBotServiceProvider) quando o cabeçalho de depuração foi enviado.
+    """
+    try:
+        request_id, operation, intel = _parse(line)
+        return _reply(request_id, operation, _decide(getattr(bot, operation), intel, force_profile))
+    except Exception as error:
+        return _error(_request_id(line), error)
+
+
+async def adecide_line(bot: BotServiceProvider, line, force_profile: bool = False) -> str:
+    """
+    Responde a uma linha do canal usando os métodos assíncronos do bot (achoose_card, ...), como os do
+    CoalescingBotServiceProvider.
+    """
+    try:
+        request_id, operation, intel = _parse(line)
+        return _reply(request_id, operation, await _decide(getattr(bot, "a" + operation), intel, force_profile))
+    except Exception as error:
+        return _error(_request_id(line), error)
+
+
+def _scope_meta(scope) -> dict:
+    """
+    Converte os cabeçalhos do scope ASGI para o formato de request.META (ex.: HTTP_X_BOT_PROFILE).
+    """
+    return {"HTTP_" + name.decode("latin-1").upper().replace("-", "_"): value.decode("latin-1")
+            for name, value in scope.get("headers", [])}
+
+
+class MatchWebSocket:
+    """
+    Aplicação ASGI de WebSocket para o canal de partida. Cada frame pode trazer uma ou mais mensagens
+    separadas por quebra de linha; as respostas são enviadas uma por frame, na ordem recebida.
+    """
+
+    def __init__(self, bot: BotServiceProvider):
+        self.bot = bot
+
+    async def __call__(self, scope, receive, send):
+        event = await receive()
+        if event["type"] != "websocket.connect":
+            return
+        if scope["path"] != MATCH_WEBSOCKET_PATH:
+            await send({"type": "websocket.close", "code": 4404})
+            return
+        await send({"type": "websocket.accept"})
+        force_profile = get_profiler().is_requested(_scope_meta(scope))
+
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                return
+            if event["type"] != "websocket.receive":
+                continue
+            text = event.get("text")
+            if text is None:
+                try:
+                    text = (event.get("bytes") or b"").decode()
+                except UnicodeDecodeError as error:
+                    await send({"type": "websocket.send", "text": _error(None, error)})
+                    continue
+            for line in text.splitlines():
+                if line.strip():
+                    await send({"type": "websocket.send", "text": await adecide_line(self.bot, line, force_profile)})
@@ -1,3 +1,410 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+from itertools import combinations
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from DjangoRemoteBot.asgi import application
+from bot import profiling
+from bot.coalescing import SingleFlight
+from bot.django_remote_bot import DjangoRemoteBot
+from bot.game_model.enums import CardRank, CardSuit
+from bot.game_model.game_intel import GameIntel
+from bot.game_model.truco_card import TrucoCard
+from bot.profiling import ProfilingBotServiceProvider, RequestProfiler
+from bot.strategy.match_equity import ACCEPT, QUIT, RE_RAISE, MATCH_EQUITY, build_match_equity
+from bot.strategy.play_evaluation import CARD_COST, evaluate_plays
+from bot.strategy.unseen_cards import MAX_RELATIVE_VALUE, UnseenCardTracker
+
+
+def card(rank, suit):
+    return TrucoCard.of(CardRank.of_symbol(rank), CardSuit.of_symbol(suit))
+
+
+def intel_json():
+    return {"cards": [{"rank": "A", "suit": "C"}], "open_cards": [{"rank": "4", "suit": "C"}],
+            "vira": {"rank": "4", "suit": "C"}, "opponent_card": None, "round_results": [],
+            "score": 0, "opponent_score": 0, "hand_points": 1}
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.profiler = RequestProfiler(self.directory)
+        self.intel = GameIntel([card("A", "C")], [card("4", "C")], card("4", "C"), None, [], 0, 0, 1)
+
+    def test_forced_call_is_profiled(self):
+        bot = ProfilingBotServiceProvider(DjangoRemoteBot(), self.profiler)
+        bot.choose_card(self.intel, force_profile=True)
+        self.assertEqual(len(list(self.directory.glob("choose_card-*.prof"))), 1)
+
+    def test_call_is_not_profiled_without_header_or_sampling(self):
+        bot = ProfilingBotServiceProvider(DjangoRemoteBot(), self.profiler)
+        bot.choose_card(self.intel)
+        self.assertEqual(list(self.directory.glob("*.prof")), [])
+
+    def test_concurrent_profile_runs_unprofiled(self):
+        with profiling._active_profile_lock:
+            self.assertEqual(self.profiler.run("choose_card", lambda: 42), 42)
+        self.assertEqual(list(self.directory.glob("*.prof")), [])
+
+    def test_rotation_keeps_most_recent_profiles(self):
+        profiler = RequestProfiler(self.directory, keep=2)
+        for _ in range(4):
+            profiler.run("choose_card", lambda: None)
+        self.assertEqual(len(list(self.directory.glob("*.prof"))), 2)
+
+    def test_profile_report_prints_table_and_folded_stacks(self):
+        bot = ProfilingBotServiceProvider(DjangoRemoteBot(), self.profiler)
+        for _ in range(2):
+            bot.choose_card(self.intel, force_profile=True)
+        folded = self.directory / "choose_card.folded"
+
+        output = io.StringIO()
+        call_command("profile_report", directory=str(self.directory), operation="choose_card", limit=5,
+                     folded=str(folded), stdout=output)
+
+        report = output.getvalue()
+        self.assertIn("ncalls  tottime  percall  cumtime  percall filename:lineno(function)", report)
+        self.assertIn("django_remote_bot.py", report)
+        self.assertIn("Wrote ", report)
+        lines = folded.read_text().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, weight = line.rsplit(" ", 1)
+            self.assertTrue(stack)
+            self.assertGreater(int(weight), 0)
+
+    def test_header_profiles_stream_decisions(self):
+        with mock.patch.object(profiling, "_profiler", self.profiler):
+            response = self.client.post("/match-stream/",
+                                        json.dumps({"id": 1, "operation": "choose_card", "intel": intel_json()}),
+                                        content_type="application/x-ndjson", HTTP_X_BOT_PROFILE="1")
+            replies = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(replies[0]["result"], {"card": {"rank": "A", "suit": "C"}, "discard": False})
+        self.assertEqual(len(list(self.directory.glob("choose_card-*.prof"))), 1)
+
+
+class TrucoCardTests(SimpleTestCase):
+    def test_of_returns_cached_hashable_card(self):
+        self.assertIs(card("K", "S"), card("K", "S"))
+        self.assertEqual(len({card("K", "S"), TrucoCard(CardRank.KING, CardSuit.SPADES)}), 1)
+
+    def test_next_rank_wraps_from_three_to_four(self):
+        self.assertEqual(CardRank.FOUR.next(), CardRank.FIVE)
+        self.assertEqual(CardRank.KING.next(), CardRank.ACE)
+        self.assertEqual(CardRank.THREE.next(), CardRank.FOUR)
+
+    def test_manilha_follows_vira(self):
+        self.assertTrue(card("5", "C").is_manilha(card("4", "D")))
+        self.assertTrue(card("4", "H").is_manilha(card("3", "S")))
+        self.assertFalse(card("3", "H").is_manilha(card("3", "S")))
+        self.assertTrue(card("A", "S").is_espadilha(card("K", "C")))
+
+    def test_relative_value(self):
+        vira = card("4", "C")
+        self.assertEqual(card("5", "C").relative_value(vira), 13)
+        self.assertEqual(card("5", "H").relative_value(vira), 12)
+        self.assertEqual(card("5", "S").relative_value(vira), 11)
+        self.assertEqual(card("5", "D").relative_value(vira), 10)
+        self.assertEqual(card("4", "H").relative_value(vira), 1)
+        self.assertEqual(card("6", "H").relative_value(vira), 2)
+        self.assertEqual(card("3", "H").relative_value(vira), 9)
+
+        vira = card("3", "C")
+        self.assertEqual(card("4", "D").relative_value(vira), 10)
+        self.assertEqual(card("5", "H").relative_value(vira), 1)
+        self.assertEqual(card("3", "H").relative_value(vira), 9)
+        self.assertEqual(TrucoCard.closed().relative_value(vira), 0)
+
+
+class UnseenCardTrackerTests(SimpleTestCase):
+    def brute_force(self, tracker, predicate):
+        hands = list(combinations(tracker.unseen, tracker.opponent_hand_size))
+        return sum(any(predicate(held) for held in hand) for hand in hands) / len(hands)
+
+    def assert_matches_brute_force(self, intel):
+        tracker = UnseenCardTracker.of(intel)
+        vira = intel.vira
+        for own in intel.cards:
+            expected = self.brute_force(tracker, lambda held: held.relative_value(vira) > own.relative_value(vira))
+            self.assertAlmostEqual(tracker.probability_opponent_beats(own), expected)
+        expected = self.brute_force(tracker, lambda held: held.is_manilha(vira))
+        self.assertAlmostEqual(tracker.probability_opponent_holds_manilha(), expected)
+
+    def test_first_round(self):
+        vira = card("7", "D")
+        self.assert_matches_brute_force(
+            GameIntel([card("Q", "C"), card("3", "S"), card("K", "H")], [vira], vira, None, [], 0, 0, 1))
+
+    def test_after_opponent_played(self):
+        vira = card("4", "C")
+        opponent = card("A", "D")
+        intel = GameIntel([card("3", "H"), card("K", "S")], [vira, card("6", "C"), card("7", "C"), opponent],
+                          vira, opponent, ["WON"], 0, 0, 1)
+        tracker = UnseenCardTracker.of(intel)
+        self.assertEqual((len(tracker.unseen), tracker.opponent_hand_size), (34, 1))
+        self.assert_matches_brute_force(intel)
+
+    def test_vira_three_makes_fours_manilhas(self):
+        vira = card("3", "S")
+        intel = GameIntel([card("4", "C"), card("2", "D")], [vira, card("J", "H")], vira, None, ["LOST"], 0, 0, 1)
+        tracker = UnseenCardTracker.of(intel)
+        self.assertEqual(tracker.count_manilhas(), 3)
+        self.assertEqual(tracker.probability_opponent_beats(card("4", "C")), 0.0)
+        self.assert_matches_brute_force(intel)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.executions = 0
+
+    def compute(self):
+        self.executions += 1
+        self.release.wait(5)
+        return "decision"
+
+    def wait_for_calls(self, calls):
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["calls"] < calls and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    async def await_calls(self, calls):
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["calls"] < calls and time.monotonic() < deadline:
+            await asyncio.sleep(0.001)
+
+    def test_concurrent_do_runs_once(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.flight.do("key", self.compute)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.wait_for_calls(8)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["decision"] * 8)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.flight.stats(), {"calls": 8, "executions": 1, "deduplicated": 7})
+
+    def test_errors_reach_every_caller(self):
+        def fail():
+            self.release.wait(5)
+            raise RuntimeError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                self.flight.do("key", fail)
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self.wait_for_calls(3)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+
+    async def test_concurrent_do_async_runs_once(self):
+        tasks = [asyncio.ensure_future(self.flight.do_async("key", self.compute)) for _ in range(8)]
+        await self.await_calls(8)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*tasks), ["decision"] * 8)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.flight.stats(), {"calls": 8, "executions": 1, "deduplicated": 7})
+
+    async def test_cancelling_leader_does_not_cancel_followers(self):
+        leader = asyncio.ensure_future(self.flight.do_async("key", self.compute))
+        follower = asyncio.ensure_future(self.flight.do_async("key", self.compute))
+        await self.await_calls(2)
+
+        leader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.release.set()
+
+        self.assertEqual(await follower, "decision")
+        self.assertEqual(self.executions, 1)
+
+
+class PlayEvaluationTests(SimpleTestCase):
+    def assert_matches_tracker(self, intel):
+        tracker = UnseenCardTracker.of(intel)
+        ranked = evaluate_plays(intel)
+        for play, score in ranked:
+            own = play.value()
+            expected = (1 - tracker.probability_opponent_beats_or_ties(own) - tracker.probability_opponent_beats(own)
+                        - CARD_COST * play.content.relative_value(intel.vira) / MAX_RELATIVE_VALUE)
+            self.assertAlmostEqual(score, expected)
+        return ranked
+
+    def test_leading_scores_match_tracker(self):
+        vira = card("4", "C")
+        intel = GameIntel([card("3", "H"), card("K", "S"), card("5", "C")], [vira], vira, None, [], 0, 0, 1)
+        ranked = self.assert_matches_tracker(intel)
+        self.assertEqual([play.content for play, _ in ranked], [card("5", "C"), card("3", "H"), card("K", "S")])
+
+    def test_leading_scores_match_tracker_after_first_round(self):
+        vira = card("3", "S")
+        intel = GameIntel([card("4", "D"), card("J", "H")], [vira, card("2", "C"), card("A", "D")], vira, None,
+                          ["LOST"], 0, 0, 1)
+        ranked = self.assert_matches_tracker(intel)
+        self.assertEqual(len(ranked), 4)
+
+    def test_known_opponent_card_prefers_cheapest_winner(self):
+        vira = card("4", "C")
+        opponent = card("A", "D")
+        intel = GameIntel([card("3", "H"), card("2", "S"), card("K", "S")], [vira, opponent], vira, opponent,
+                          ["LOST"], 0, 0, 1)
+        ranked = evaluate_plays(intel)
+
+        best, _ = ranked[0]
+        self.assertEqual((best.content, best.discard), (card("2", "S"), False))
+        self.assertEqual(len(ranked), 6)
+
+
+class MatchEquityTests(SimpleTestCase):
+    def intel(self, score, opponent_score, hand_points):
+        vira = card("4", "C")
+        return GameIntel([card("A", "C")], [vira], vira, None, [], score, opponent_score, hand_points)
+
+    def test_even_hands_are_symmetric(self):
+        for score in range(12):
+            self.assertAlmostEqual(MATCH_EQUITY.equity(score, score), 0.5)
+            for opponent_score in range(12):
+                self.assertAlmostEqual(MATCH_EQUITY.equity(score, opponent_score) +
+                                       MATCH_EQUITY.equity(opponent_score, score), 1.0)
+
+    def test_finished_matches(self):
+        self.assertEqual(MATCH_EQUITY.equity(12, 5), 1.0)
+        self.assertEqual(MATCH_EQUITY.equity(5, 12), 0.0)
+
+    def test_mao_de_onze_and_mao_de_ferro(self):
+        table = MATCH_EQUITY
+        self.assertAlmostEqual(table.equity(11, 11), 0.5)
+        for opponent_score in range(11):
+            play = 0.5 + 0.5 * table.equity(11, opponent_score + 3)
+            run = table.equity(11, opponent_score + 1)
+            self.assertAlmostEqual(table.equity(11, opponent_score), max(play, run))
+        self.assertAlmostEqual(build_match_equity(0.7).equity(11, 11), 0.7)
+
+    def test_equity_is_monotonic_in_score(self):
+        for hand_win_probability in (0.3, 0.5, 0.7):
+            table = build_match_equity(hand_win_probability)
+            for score in range(12):
+                for opponent_score in range(12):
+                    current = table.equity(score, opponent_score)
+                    self.assertGreaterEqual(table.equity(score + 1, opponent_score), current)
+                    self.assertLessEqual(table.equity(score, opponent_score + 1), current)
+
+    def test_raise_response(self):
+        self.assertEqual(MATCH_EQUITY.raise_response(self.intel(0, 0, 1), 0.01), QUIT)
+        self.assertEqual(MATCH_EQUITY.raise_response(self.intel(0, 0, 1), 0.95), RE_RAISE)
+        self.assertEqual(MATCH_EQUITY.raise_response(self.intel(0, 0, 9), 0.95), ACCEPT)
+        self.assertEqual(MATCH_EQUITY.raise_response(self.intel(0, 0, 12), 0.5), ACCEPT)
+
+    def test_should_raise(self):
+        self.assertTrue(MATCH_EQUITY.should_raise(self.intel(0, 0, 1), 0.9))
+        self.assertFalse(MATCH_EQUITY.should_raise(self.intel(0, 0, 1), 0.1))
+        self.assertFalse(MATCH_EQUITY.should_raise(self.intel(0, 0, 12), 1.0))
+
+    def test_no_raising_in_mao_de_onze(self):
+        self.assertFalse(MATCH_EQUITY.should_raise(self.intel(11, 5, 3), 1.0))
+        self.assertFalse(MATCH_EQUITY.should_raise(self.intel(5, 11, 3), 1.0))
+        self.assertNotEqual(MATCH_EQUITY.raise_response(self.intel(5, 11, 1), 0.95), RE_RAISE)
+
+
+class MatchWebSocketTests(SimpleTestCase):
+    async def talk(self, *events, path="/ws/match/"):
+        incoming = [{"type": "websocket.connect"}, *events, {"type": "websocket.disconnect", "code": 1000}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await asyncio.wait_for(application({"type": "websocket", "path": path, "headers": []}, receive, send), 5)
+        self.assertEqual(incoming, [])
+        return sent
+
+    def message(self, request_id, operation="choose_card"):
+        return json.dumps({"id": request_id, "operation": operation, "intel": intel_json()})
+
+    def replies(self, sent):
+        self.assertEqual(sent[0], {"type": "websocket.accept"})
+        return [json.loads(message["text"]) for message in sent[1:]]
+
+    async def test_replies_arrive_in_order(self):
+        sent = await self.talk(
+            {"type": "websocket.receive", "text": self.message(1) + "\n" + self.message(2, "decide_if_raises")},
+            {"type": "websocket.receive", "bytes": self.message(3, "get_raise_response").encode()})
+        self.assertEqual(self.replies(sent), [
+            {"id": 1, "operation": "choose_card", "result": {"card": {"rank": "A", "suit": "C"}, "discard": False}},
+            {"id": 2, "operation": "decide_if_raises", "result": False},
+            {"id": 3, "operation": "get_raise_response", "result": 0},
+        ])
+
+    async def test_bad_messages_get_error_replies_and_keep_the_channel(self):
+        sent = await self.talk(
+            {"type": "websocket.receive", "text": "not json"},
+            {"type": "websocket.receive", "text": self.message(2, "shuffle")},
+            {"type": "websocket.receive", "bytes": b"\xff\xfe"},
+            {"type": "websocket.receive", "text": self.message(4)})
+        replies = self.replies(sent)
+        self.assertEqual([reply["id"] for reply in replies], [None, 2, None, 4])
+        self.assertIn("error", replies[0])
+        self.assertEqual(replies[1]["error"], "Unknown operation: shuffle")
+        self.assertIn("error", replies[2])
+        self.assertIn("result", replies[3])
+
+    async def test_wrong_path_is_closed(self):
+        sent = []
+
+        async def receive():
+            return {"type": "websocket.connect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await application({"type": "websocket", "path": "/ws/other/", "headers": []}, receive, send)
+        self.assertEqual(sent, [{"type": "websocket.close", "code": 4404}])
+
+    async def test_disconnect_ends_the_channel(self):
+        sent = await self.talk()
+        self.assertEqual(sent, [{"type": "websocket.accept"}])
+
+
+class MatchStreamTests(SimpleTestCase):
+    def test_replies_one_line_per_message_in_order(self):
+        body = "\n".join([json.dumps({"id": 1, "operation": "choose_card", "intel": intel_json()}), "oops",
+                          json.dumps({"id": 3, "operation": "get_mao_de_onze_response", "intel": intel_json()})])
+        response = self.client.post("/match-stream/", body, content_type="application/x-ndjson")
+        replies = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([reply["id"] for reply in replies], [1, None, 3])
+        self.assertIn("error", replies[1])
+        self.assertEqual(replies[2]["result"], False)
+
+    def test_only_post_is_allowed(self):
+        self.assertEqual(self.client.get("/match-stream/").status_code, 405)
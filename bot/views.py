@@ -1,22 +1,44 @@
-from django.http import JsonResponse
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render
 from bot.game_model.interfaces import BotServiceProvider
 from bot.game_model.game_intel import GameIntel
 from bot.django_remote_bot import DjangoRemoteBot;
+from bot.profiling import ProfilingBotServiceProvider, get_profiler
+from bot.coalescing import CoalescingBotServiceProvider
+from bot.streaming import decide_line
 
-bot_instance = DjangoRemoteBot();
+coalescing_bot = CoalescingBotServiceProvider(DjangoRemoteBot());
+bot_instance = ProfilingBotServiceProvider(coalescing_bot);
 # Create your views here.
 def getMaoDeOnzeResponse(self,intel: GameIntel):
-  return bot_instance.get_mao_de_onze_response(intel)
+  return bot_instance.get_mao_de_onze_response(intel, get_profiler().is_requested(self.META))
    
 def decideIfRaises(self,intel: GameIntel):
-  return bot_instance.decide_if_raises(intel)
+  return bot_instance.decide_if_raises(intel, get_profiler().is_requested(self.META))
    
 def chooseCard(self,intel: GameIntel):
-  return bot_instance.choose_card(intel)
+  return bot_instance.choose_card(intel, get_profiler().is_requested(self.META))
    
 def getRaiseResponse(self,intel: GameIntel):
-  return bot_instance.get_raise_response(intel)
+  return bot_instance.get_raise_response(intel, get_profiler().is_requested(self.META))
 
 def getName(self):
   return bot_instance.getName()
+
+def getCoalescingStats(self):
+  return JsonResponse(coalescing_bot.flight.stats())
+
+@csrf_exempt
+def streamMatch(request):
+  """
+  Endpoint em lote: recebe todas as mensagens de uma partida em NDJSON no corpo do POST e devolve
+  uma resposta por linha, na mesma ordem. O Django lê o corpo inteiro antes de chamar a view, então
+  as respostas não podem influenciar as mensagens seguintes; para jogo interativo use o WebSocket
+  em /ws/match/ (bot.streaming.MatchWebSocket).
+  """
+  if request.method != 'POST':
+    return HttpResponseNotAllowed(['POST'])
+  force_profile = get_profiler().is_requested(request.META)
+  decisions = (decide_line(bot_instance, line, force_profile) + "\n" for line in request if line.strip())
+  return StreamingHttpResponse(decisions, content_type='application/x-ndjson')